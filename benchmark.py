@@ -0,0 +1,281 @@
+"""
+Offline message-throughput benchmark for the auto-reply bot
+Drives handle_private_message / handle_group_message with synthetic updates through a
+fake Telegram transport (no network) and prints a JSON report:
+    
+    python benchmark.py --keywords 10000 --messages 20000 --users 500 --concurrency 8
+    python benchmark.py --mix exact=0.5,unknown=0.5 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+WORK_DIR = tempfile.mkdtemp(prefix="bot-bench-")
+
+# Isolated database/backups for the run; must be set before bot.py reads its configuration
+os.environ["DB_PATH"] = os.path.join(WORK_DIR, "bench.db")
+os.environ["BACKUP_DIR"] = os.path.join(WORK_DIR, "backups")
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ.setdefault("SMART_RULES_PATH", os.path.join(REPO_DIR, "smart_rules.json"))
+# Synthetic senders post far faster than people; set these to benchmark flood control itself
+os.environ.setdefault("FLOOD_USER_LIMIT", "0")
+os.environ.setdefault("FLOOD_CHAT_LIMIT", "0")
+# Telegram's send limits would turn the run into a measure of the rate limiter
+for name in ("SEND_RATE_GLOBAL", "SEND_RATE_PER_CHAT", "SEND_RATE_PER_GROUP"):
+    os.environ.setdefault(name, "1000000")
+
+from telegram import Bot, Update
+from telegram.ext import Application, ContextTypes
+from telegram.request import BaseRequest, RequestData
+
+import bot as bot_module
+
+DEFAULT_MIX = "exact=0.25,contains=0.25,fuzzy=0.1,smart=0.2,unknown=0.2"
+DEVANAGARI = "कखगघचछजझटडतथदधनपफबभमयरलवशसह"
+VOWEL_SIGNS = "ािीुूेैोौं"
+SMART_MESSAGES = ["धन्यवाद भाई", "अभी क्या समय है", "आज की तारीख बताओ", "bye bye", "तुम कौन हो", "help please"]
+
+# ==================== FAKE TRANSPORT ====================
+class FakeRequest(BaseRequest):
+    """Answers Bot API calls locally; sendMessage echoes a message object back"""
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self.message_id = 0
+    
+    async def initialize(self):
+        pass
+    
+    async def shutdown(self):
+        pass
+    
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         read_timeout=None, write_timeout=None, connect_timeout=None,
+                         pool_timeout=None) -> Tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        parameters = request_data.parameters if request_data else {}
+        if endpoint == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif endpoint == "sendMessage":
+            self.message_id += 1
+            result = {
+                "message_id": self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": parameters.get("chat_id"), "type": "private"},
+                "text": parameters.get("text", ""),
+            }
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+# ==================== WORKLOAD ====================
+def random_word(rng: random.Random) -> str:
+    """Latin or Devanagari pseudo-word"""
+    if rng.random() < 0.3:
+        return "".join(rng.choice(DEVANAGARI) + rng.choice(VOWEL_SIGNS) for _ in range(rng.randint(2, 4)))
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+def make_keywords(rng: random.Random, count: int) -> List[str]:
+    keywords = set()
+    while len(keywords) < count:
+        words = [random_word(rng) for _ in range(rng.choice((1, 1, 1, 2)))]
+        keywords.add(" ".join(words))
+    return sorted(keywords)
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in ("exact", "contains", "fuzzy", "smart", "unknown"):
+            raise argparse.ArgumentTypeError(f"unknown message kind: {kind}")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+def make_message(rng: random.Random, kind: str, keywords: List[str]) -> str:
+    keyword = rng.choice(keywords) if keywords else random_word(rng)
+    if kind == "exact":
+        return keyword
+    if kind == "contains":
+        return f"{random_word(rng)} {keyword} {random_word(rng)}"
+    if kind == "fuzzy":
+        position = rng.randrange(1, len(keyword)) if len(keyword) > 1 else 0
+        return keyword[:position] + keyword[position + 1:]
+    if kind == "smart":
+        return rng.choice(SMART_MESSAGES)
+    return " ".join(random_word(rng) for _ in range(rng.randint(1, 6)))
+
+def make_update(update_id: int, text: str, user_id: int, chat_id: int, telegram_bot: Bot) -> Update:
+    chat = {"id": chat_id, "type": "group", "title": f"Group {chat_id}"} if chat_id < 0 else \
+        {"id": chat_id, "type": "private", "first_name": f"User{user_id}"}
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": chat,
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"},
+            "text": text,
+        },
+    }, telegram_bot)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+# ==================== RUN ====================
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    rng = random.Random(args.seed)
+    request = FakeRequest(latency=args.send_latency / 1000)
+    telegram_bot = Bot("1:bench", request=request, get_updates_request=FakeRequest())
+    application = Application.builder().bot(telegram_bot).updater(None).build()
+    await telegram_bot.initialize()
+    
+    auto_bot = bot_module.AdvancedAutoReplyBot("1:bench")
+    bot_module.logging.getLogger().setLevel(bot_module.logging.WARNING)
+    auto_bot.start_outbox(telegram_bot)
+    db = auto_bot.db
+    
+    # Seed the keyword table through the bulk importer, then rebuild the in-memory indexes
+    keywords = make_keywords(rng, args.keywords)
+    setup_start = time.perf_counter()
+    db.import_records(
+        ('replies', {'keyword': keyword, 'reply': f"reply {i}", 'match_mode': args.match_mode})
+        for i, keyword in enumerate(keywords)
+    )
+    db.load_state()
+    setup_seconds = time.perf_counter() - setup_start
+    
+    # Count transactions on the shared connection (the bulk import used its own)
+    statements = {"commits": 0}
+    
+    def trace(statement: str):
+        if statement.startswith("COMMIT"):
+            statements["commits"] += 1
+    
+    db.conn.set_trace_callback(trace)
+    
+    mix = parse_mix(args.mix)
+    kinds, weights = list(mix), list(mix.values())
+    groups = [-(1000 + i) for i in range(args.groups)]
+    updates = []
+    for update_id in range(args.messages):
+        user_id = rng.randint(1, args.users)
+        chat_id = rng.choice(groups) if groups and rng.random() < args.group_ratio else user_id
+        text = make_message(rng, rng.choices(kinds, weights)[0], keywords)
+        updates.append(make_update(update_id, text, user_id, chat_id, telegram_bot))
+    
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    async def handle(update: Update):
+        async with semaphore:
+            context = ContextTypes.DEFAULT_TYPE.from_update(update, application)
+            started = time.perf_counter()
+            if update.effective_chat.type == "private":
+                await auto_bot.handle_private_message(update, context)
+            else:
+                await auto_bot.handle_group_message(update, context)
+            latencies.append(time.perf_counter() - started)
+    
+    run_start = time.perf_counter()
+    await asyncio.gather(*(handle(update) for update in updates))
+    # Queued replies, buffered stats and logs are part of the cost of handling these messages
+    await auto_bot.outbox.close(timeout=3600)
+    await auto_bot.adb.flush_writes()
+    wall_seconds = time.perf_counter() - run_start
+    
+    db.conn.set_trace_callback(None)
+    auto_bot.adb.shutdown()
+    db.close()
+    await telegram_bot.shutdown()
+    
+    latencies.sort()
+    sends = request.calls.get("sendMessage", 0)
+    return {
+        "config": {
+            "keywords": args.keywords,
+            "messages": args.messages,
+            "users": args.users,
+            "groups": args.groups,
+            "group_ratio": args.group_ratio,
+            "mix": mix,
+            "match_mode": args.match_mode,
+            "concurrency": args.concurrency,
+            "send_coalesce_window": bot_module.SEND_COALESCE_WINDOW,
+            "send_latency_ms": args.send_latency,
+            "write_flush_max_events": bot_module.WRITE_FLUSH_MAX_EVENTS,
+            "write_flush_interval": bot_module.WRITE_FLUSH_INTERVAL,
+            "seed": args.seed,
+            "python": sys.version.split()[0],
+            "work_dir": WORK_DIR if args.keep else None,
+        },
+        "setup_seconds": round(setup_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_msgs_per_sec": round(len(latencies) / wall_seconds, 1) if wall_seconds else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p90": round(percentile(latencies, 0.90) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        },
+        "db_commits": statements["commits"],
+        "db_commits_per_message": round(statements["commits"] / len(latencies), 4) if latencies else 0.0,
+        "sends": sends,
+        "sends_per_message": round(sends / len(latencies), 4) if latencies else 0.0,
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for bot.py")
+    parser.add_argument("--keywords", type=int, default=1000, help="auto-reply keywords to seed")
+    parser.add_argument("--messages", type=int, default=5000, help="synthetic messages to handle")
+    parser.add_argument("--users", type=int, default=200, help="distinct senders")
+    parser.add_argument("--groups", type=int, default=10, help="distinct group chats")
+    parser.add_argument("--group-ratio", type=float, default=0.3, help="share of messages sent in groups")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="message kinds and weights: exact, contains, fuzzy, smart, unknown")
+    parser.add_argument("--match-mode", choices=bot_module.MATCH_MODES, default=bot_module.DEFAULT_MATCH_MODE,
+                        help="match mode of the seeded keywords")
+    parser.add_argument("--concurrency", type=int, default=1, help="messages handled at the same time")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="simulated Bot API latency (ms)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the temporary database and logs (their directory is in the report)")
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(WORK_DIR)  # bot.log and exports stay out of the working tree
+    try:
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        if not args.keep:
+            os.chdir(REPO_DIR)
+            shutil.rmtree(WORK_DIR, ignore_errors=True)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+if __name__ == '__main__':
+    main()
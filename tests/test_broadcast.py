@@ -0,0 +1,33 @@
+"""BroadcastEngine against each storage backend, with a fake Bot that fails for some users"""
+
+from telegram.error import ChatMigrated, Forbidden, TelegramError
+
+import bot
+
+
+class FakeBot:
+    def __init__(self, errors):
+        self.errors = errors
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id in self.errors:
+            raise self.errors[chat_id]
+        self.sent.append(chat_id)
+
+
+def test_broadcast_counts_telegram_errors_as_failed(storage):
+    fake = FakeBot({2: ChatMigrated(-1002), 3: TelegramError("message is too long"), 4: Forbidden("blocked")})
+
+    async def scenario(db):
+        for user_id in range(1, 6):
+            await db.update_user_stats(user_id, "u", "F")
+        job_id = (await db.create_broadcast("hey", 0))[0]
+        limiter = bot.SendRateLimiter(global_rate=1000, per_chat_rate=1000)
+        await bot.BroadcastEngine(db, fake, limiter).run(job_id)
+        return (await db.get_broadcast(job_id))[4:], await db.get_unfinished_broadcasts()
+
+    (last_user_id, sent, failed, status), unfinished = storage(scenario)
+    assert fake.sent == [1, 5]
+    assert (last_user_id, sent, failed, status) == (5, 2, 3, "done")
+    assert unfinished == []
@@ -0,0 +1,77 @@
+"""Update dispatch: per-chat ordering in ChatOrderedApplication and PendingUpdateQueue backpressure"""
+
+import asyncio
+import random
+
+from telegram import Bot, Update
+from telegram.ext import Application, TypeHandler
+
+import bot
+
+
+class OfflineBot(Bot):
+    async def initialize(self):
+        """No getMe: these tests never reach the Bot API"""
+
+    async def shutdown(self):
+        pass
+
+
+def make_update(update_id, chat_id):
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {"message_id": update_id, "date": 0, "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "u"}, "text": str(update_id)},
+    }, None)
+
+
+def test_chats_run_concurrently_but_each_in_order():
+    random.seed(7)
+    handled = {}
+    running = {"now": 0, "max": 0}
+
+    async def handler(update, context):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(random.uniform(0, 0.003))
+        handled.setdefault(update.effective_chat.id, []).append(update.update_id)
+        running["now"] -= 1
+
+    async def scenario():
+        application = (
+            Application.builder()
+            .bot(OfflineBot("123:abc"))
+            .application_class(bot.ChatOrderedApplication, kwargs={"max_concurrent": 4})
+            .concurrent_updates(1024)
+            .build()
+        )
+        application.add_handler(TypeHandler(Update, handler))
+        # Interleaved chats, dispatched the way the update fetcher does: one task per update
+        updates = [make_update(i, random.choice((1, 2, 3, 4, 5, 6))) for i in range(1, 301)]
+        async with application:
+            await asyncio.gather(*(application.process_update(update) for update in updates))
+        return updates, application.chat_locks
+
+    updates, chat_locks = asyncio.run(scenario())
+    for chat_id, update_ids in handled.items():
+        assert update_ids == [u.update_id for u in updates if u.effective_chat.id == chat_id]
+    assert sum(len(ids) for ids in handled.values()) == 300
+    assert 1 < running["max"] <= 4
+    assert chat_locks == {}
+
+
+def test_pending_update_queue_holds_producers_back():
+    async def scenario():
+        updates = bot.PendingUpdateQueue(max_pending=2)
+        await updates.put("a")
+        await updates.put("b")
+        # Taken off the queue but not processed yet: still pending
+        await updates.get()
+        third = asyncio.create_task(updates.put("c"))
+        await asyncio.sleep(0.05)
+        blocked = not third.done()
+        updates.task_done()
+        await asyncio.wait_for(third, 1)
+        return blocked, updates.outstanding, updates.qsize()
+
+    assert asyncio.run(scenario()) == (True, 2, 2)
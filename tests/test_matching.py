@@ -0,0 +1,38 @@
+"""In-memory keyword matching: KeywordIndex and its FuzzyIndex tier"""
+
+import bot
+
+
+def test_word_keywords_sharing_tokens_are_indexed_independently():
+    index = bot.KeywordIndex([("hi", "word"), ("hi!", "word")])
+    assert index.search("hi there") == ["hi!", "hi"]
+
+    index.remove("hi!")
+    assert index.search("hi there") == ["hi"]
+    index.add("hi!", "word")
+    index.remove("hi")
+    assert index.search("hi there") == ["hi!"]
+    index.remove("hi!")
+    assert index.search("hi there") == []
+    assert index.token_keywords == {}
+
+
+def test_re_adding_a_word_keyword_replaces_it():
+    index = bot.KeywordIndex([("hi", "word")])
+    index.add("Hi", "word")
+    assert index.search("HI there") == ["Hi"]
+    index.add("hi", "substring")
+    assert index.search("this") == ["hi"]
+
+
+def test_fuzzy_keywords_sharing_a_term_are_indexed_independently():
+    index = bot.FuzzyIndex(max_distance=1, min_length=4)
+    index.add("hello")
+    index.add("hello!")
+    assert index.search("helo there") == ["hello", "hello!"]
+
+    index.remove("hello")
+    assert index.search("helo there") == ["hello!"]
+    index.remove("hello!")
+    assert index.search("helo there") == []
+    assert index.terms == {} and index.deletes == {}
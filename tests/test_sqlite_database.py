@@ -0,0 +1,73 @@
+"""SQLite-only features: schema migrations and bulk import (shared behaviour is in the conformance suite)"""
+
+import sqlite3
+
+import bot
+
+
+def test_v5_merges_keywords_differing_in_case(tmp_path):
+    path = str(tmp_path / "old.db")
+    bot.AutoReplyDatabase(path).close()
+    # A v4 database: keyword_norm was indexed but not unique
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        DROP INDEX idx_auto_replies_keyword_norm_unique;
+        CREATE INDEX idx_auto_replies_keyword_norm ON auto_replies(keyword_norm);
+        PRAGMA user_version = 4;
+    ''')
+    conn.executemany(
+        'INSERT INTO auto_replies (keyword, keyword_norm, reply, usage_count) VALUES (?, ?, ?, ?)',
+        [("hello", "hello", "old reply", 3), ("Hello", "hello", "new reply", 2), ("bye", "bye", "ciao", 1)]
+    )
+    conn.commit()
+    conn.close()
+
+    db = bot.AutoReplyDatabase(path)
+    try:
+        assert db.get_all_replies(1, 10) == ([("Hello", "new reply", 5), ("bye", "ciao", 1)], 2)
+        assert db.conn.execute('PRAGMA user_version').fetchone()[0] >= 5
+        assert db.add_reply("HELLO", "newest")
+        assert db.get_all_replies(1, 10) == ([("HELLO", "newest", 0), ("bye", "ciao", 1)], 2)
+    finally:
+        db.close()
+
+
+def test_import_uses_default_match_mode_for_new_keywords(tmp_path):
+    db = bot.AutoReplyDatabase(str(tmp_path / "import.db"))
+    try:
+        db.add_reply("kept", "a", match_mode="substring")
+        counts = db.import_records([
+            ('replies', {'keyword': 'kept', 'reply': 'b'}),
+            ('replies', {'keyword': 'fresh', 'reply': 'c'}),
+            ('replies', {'keyword': 'explicit', 'reply': 'd', 'match_mode': 'substring'}),
+        ])
+        modes = dict(db.conn.execute('SELECT keyword, match_mode FROM auto_replies').fetchall())
+    finally:
+        db.close()
+
+    assert counts['replies'] == 3
+    assert modes == {'kept': 'substring', 'fresh': bot.DEFAULT_MATCH_MODE, 'explicit': 'substring'}
+
+
+def test_migration_leaves_auto_vacuum_conversion_to_the_operator(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    # A file from before incremental auto-vacuum, with pruneable chat logs
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        PRAGMA auto_vacuum = NONE;
+        CREATE TABLE chat_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER,
+                                message TEXT, reply TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    ''')
+    conn.executemany('INSERT INTO chat_logs (user_id, message, reply) VALUES (?, ?, ?)',
+                     [(1, "x" * 500, "y") for _ in range(200)])
+    conn.commit()
+    conn.close()
+
+    db = bot.AutoReplyDatabase(path)
+    try:
+        assert db.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+        result = db.prune_chat_logs(0, 10)
+    finally:
+        db.close()
+    assert result['deleted_rows'] == 190
+    assert result['vacuumed_pages'] == 0
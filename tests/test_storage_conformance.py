@@ -0,0 +1,224 @@
+"""Behaviour every StorageBackend must share (see conftest.py for how backends are selected)"""
+
+import bot
+
+
+def test_add_and_get_reply(storage):
+    async def scenario(db):
+        assert await db.add_reply("Hello", "hi there")
+        assert await db.add_reply("नमस्ते", "नमस्ते जी")
+        return (
+            (await db.get_reply("hello")).source,
+            (await db.get_reply("  HELLO ")).source,
+            (await db.get_reply("नमस्ते")).source,
+            await db.get_reply("nope"),
+            await db.get_reply_count(),
+        )
+
+    assert storage(scenario) == ("hi there", "hi there", "नमस्ते जी", None, 2)
+
+
+def test_replace_reply_keeps_one_row(storage):
+    async def scenario(db):
+        await db.add_reply("hello", "old reply")
+        await db.add_reply("hello", "new reply")
+        return (await db.get_reply("hello")).source, await db.get_reply_count()
+
+    assert storage(scenario) == ("new reply", 1)
+
+
+def test_keywords_differing_in_case_share_a_row(storage):
+    async def scenario(db):
+        await db.add_reply("hello", "old reply")
+        await db.add_reply("Hello", "new reply")
+        return (await db.get_reply("HELLO")).source, await db.get_all_replies(1, 10)
+
+    assert storage(scenario) == ("new reply", ([("Hello", "new reply", 1)], 1))
+
+
+def test_replaced_reply_survives_cache_expiry(storage):
+    async def scenario(db):
+        await db.add_reply("hello", "old reply")
+        await db.add_reply("Hello", "new reply")
+        cached = (await db.get_reply("hello")).source
+        db.reply_cache.invalidate()  # what a TTL expiry does
+        return cached, (await db.get_reply("hello")).source, (await db.get_reply("HELLO")).source
+
+    assert storage(scenario) == ("new reply", "new reply", "new reply")
+
+
+def test_search_longest_keyword_first(storage):
+    async def scenario(db):
+        await db.add_reply("good", "a")
+        await db.add_reply("good morning", "b")
+        return await db.search_keywords("oh GOOD MORNING friend")
+
+    assert storage(scenario) == ["good morning", "good"]
+
+
+def test_match_modes(storage):
+    async def scenario(db):
+        await db.add_reply("hi", "hey", match_mode="word")
+        await db.add_reply("cat", "meow", match_mode="substring")
+        found = await db.search_keywords("this catalogue")
+        assert await db.set_match_mode("hi", "substring")
+        return found, await db.search_keywords("this catalogue")
+
+    assert storage(scenario) == (["cat"], ["cat", "hi"])
+
+
+def test_fuzzy_search(storage):
+    async def scenario(db):
+        await db.add_reply("hello", "hi")
+        return await db.search_fuzzy("helo there")
+
+    assert storage(scenario) == ["hello"]
+
+
+def test_delete_reply(storage):
+    async def scenario(db):
+        await db.add_reply("Hello", "hi")
+        deleted = await db.delete_reply("HELLO")
+        return deleted, await db.get_reply("hello"), await db.delete_reply("hello"), await db.get_reply_count()
+
+    assert storage(scenario) == (True, None, False, 0)
+
+
+def test_list_replies_with_usage(storage):
+    async def scenario(db):
+        await db.add_reply("b", "two")
+        await db.add_reply("a", "one")
+        await db.add_reply("c", "three")
+        await db.get_reply("a")
+        await db.get_reply("a")
+        return await db.get_all_replies(1, 2), await db.get_all_replies(2, 2)
+
+    first, second = storage(scenario)
+    assert first == ([("a", "one", 2), ("b", "two", 0)], 3)
+    assert second == ([("c", "three", 0)], 3)
+
+
+def test_user_stats_and_leaderboard(storage):
+    async def scenario(db):
+        for _ in range(3):
+            await db.update_user_stats(5, "u", "F", "L")
+        await db.update_user_stats(6, None, "G")
+        stats = await db.get_user_stats(5)
+        return (
+            stats[:5],
+            await db.get_top_users(5),
+            await db.get_user_position(6),
+            await db.get_total_users(),
+            await db.get_user_stats(7),
+        )
+
+    stats, top, position, total, missing = storage(scenario)
+    assert stats == (5, "u", "F", "L", 3)
+    assert top == [("u", "F", 3), (None, "G", 1)]
+    assert position == 2
+    assert total == 2
+    assert missing is None
+
+
+def test_leaderboard_reads_do_not_flush(storage):
+    async def scenario(db):
+        await db.update_user_stats(5, "u", "F")
+        await db.update_user_stats(6, "v", "G")
+        await db.flush_writes()
+        await db.update_user_stats(6, "v", "G")
+        await db.update_user_stats(6, "v", "G")
+        # Served from the board as of the last flush, the buffer stays put
+        top = await db.get_top_users(5)
+        total = await db.get_total_users()
+        position_of_other = await db.get_user_position(5)
+        buffered = db.pending_writes()
+        # Reading a user with buffered messages flushes, so their own numbers are exact
+        position = await db.get_user_position(6)
+        return top, total, position_of_other, buffered, position, await db.get_top_users(5)
+
+    top, total, position_of_other, buffered, position, top_after = storage(scenario)
+    assert top == [("u", "F", 1), ("v", "G", 1)]
+    assert (total, position_of_other, buffered) == (2, 1, 2)
+    assert position == 1
+    assert top_after == [("v", "G", 3), ("u", "F", 1)]
+
+
+def test_group_settings(storage):
+    async def scenario(db):
+        await db.update_group(-100, "G1")
+        await db.set_group_auto_reply(-100, False)
+        await db.update_group(-100, "G1 renamed")
+        return (
+            await db.get_group_auto_reply_status(-100),
+            await db.get_group_auto_reply_status(-5),
+        )
+
+    assert storage(scenario) == (False, True)
+
+
+def test_chat_history_and_pruning(storage):
+    async def scenario(db):
+        for i in range(5):
+            await db.log_chat(5, f"m{i}", f"r{i}")
+        await db.log_chat(6, "other", "user")
+        history = [row[:2] for row in await db.get_chat_history(5, 2)]
+        result = await db.prune_chat_logs(90, 3)
+        return history, result["deleted_rows"], len(await db.get_chat_history(5, 10))
+
+    assert storage(scenario) == ([("m4", "r4"), ("m3", "r3")], 3, 2)
+
+
+def test_broadcast_jobs(storage):
+    async def scenario(db):
+        for user_id in (3, 1, 2):
+            await db.update_user_stats(user_id, "u", "F")
+        job = await db.create_broadcast("hey", 42)
+        job_id = job[0]
+        chunk = await db.get_user_ids_after(0, 2)
+        await db.update_broadcast_progress(job_id, 2, 1, 1)
+        progress = (await db.get_broadcast(job_id))[1:]
+        rest = await db.get_user_ids_after(2, 10)
+        await db.update_broadcast_progress(job_id, 3, 2, 1, "done")
+        return job[1:], chunk, progress, rest, (await db.get_broadcast(job_id))[7], await db.get_broadcast(999)
+
+    created, chunk, progress, rest, status, missing = storage(scenario)
+    assert created == ("hey", 42, 3, 0, 0, 0, "running")
+    assert chunk == [1, 2]
+    assert progress == ("hey", 42, 3, 2, 1, 1, "running")
+    assert rest == [3]
+    assert status == "done"
+    assert missing is None
+
+
+def test_broadcast_lease(storage, monkeypatch):
+    async def scenario(db):
+        job_id = (await db.create_broadcast("hey", 42))[0]
+        # A job that is being checkpointed belongs to whoever runs it
+        owned = await db.get_unfinished_broadcasts()
+        await db.update_broadcast_progress(job_id, 0, 0, 0, release=True)
+        claimed = await db.get_unfinished_broadcasts()
+        claimed_again = await db.get_unfinished_broadcasts()
+        monkeypatch.setattr(bot, "BROADCAST_LEASE_SECONDS", -5)
+        expired = await db.get_unfinished_broadcasts()
+        await db.update_broadcast_progress(job_id, 0, 0, 0, "done")
+        return owned, claimed, claimed_again, expired, await db.get_unfinished_broadcasts()
+
+    job = [1]
+    assert storage(scenario) == ([], job, [], job, [])
+
+
+def test_state_survives_reload(storage):
+    async def scenario(db):
+        await db.add_reply("hello", "hi", match_mode="word")
+        await db.set_group_auto_reply(-1, False)
+        await db.update_user_stats(1, "u", "F")
+        await db.flush_writes()
+        await db.load_state()
+        return (
+            (await db.get_reply("hello")).source,
+            await db.search_keywords("say hello"),
+            await db.get_group_auto_reply_status(-1),
+            await db.get_top_users(1),
+        )
+
+    assert storage(scenario) == ("hi", ["hello"], False, [("u", "F", 1)])
@@ -0,0 +1,59 @@
+"""Webhook endpoint: only updates posted with the secret reach the update queue"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+import bot
+
+UPDATE = {"update_id": 1, "message": {"message_id": 1, "date": 0, "chat": {"id": 5, "type": "private"}, "text": "hi"}}
+
+
+async def post_all(secret, requests):
+    application = SimpleNamespace(update_queue=asyncio.Queue(), bot=None)
+    client = TestClient(TestServer(bot.build_webhook_app(application, None, secret)))
+    await client.start_server()
+    try:
+        statuses = []
+        for headers, body in requests:
+            response = await client.post(bot.WEBHOOK_PATH, data=body, headers=headers)
+            statuses.append(response.status)
+    finally:
+        await client.close()
+    return statuses, application.update_queue.qsize()
+
+
+def test_secret_is_required():
+    body = json.dumps(UPDATE)
+    statuses, queued = asyncio.run(post_all("s3cret", [
+        ({}, body),
+        ({"X-Telegram-Bot-Api-Secret-Token": "guess"}, body),
+        ({"X-Telegram-Bot-Api-Secret-Token": "s3cret"}, body),
+    ]))
+    assert statuses == [403, 403, 200]
+    assert queued == 1
+
+
+@pytest.mark.parametrize("body", ["[1, 2]", "42", "null", "{}", '{"message": {}}', "not json"])
+def test_malformed_bodies_are_rejected(body):
+    statuses, queued = asyncio.run(post_all("", [({}, body)]))
+    assert statuses == [400]
+    assert queued == 0
+
+
+@pytest.mark.parametrize("listen, url, secret, refused", [
+    ("0.0.0.0", "", "", True),
+    ("0.0.0.0", "", "s3cret", False),
+    ("0.0.0.0", "https://example.org/webhook", "", False),
+    ("127.0.0.1", "", "", False),
+    ("::1", "", "", False),
+    ("localhost", "", "", False),
+])
+def test_webhook_refuses_to_run_open(monkeypatch, listen, url, secret, refused):
+    monkeypatch.setattr(bot, "WEBHOOK_LISTEN", listen)
+    monkeypatch.setattr(bot, "WEBHOOK_URL", url)
+    monkeypatch.setattr(bot, "WEBHOOK_SECRET", secret)
+    assert (bot.webhook_secret_error() is not None) == refused